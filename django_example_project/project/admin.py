@@ -7,34 +7,41 @@ from project.models import Dependency
 
 
 def patch_schema_for_jsonform(schema):
-    """recursively patch a schema dictionary in-place to fix any missing properties/keys on objects"""
-
-    # base case: schema is type: "object" with no properties/keys
-    if schema.get('type') == 'object' and not ('properties' in schema or 'keys' in schema):
-        if 'default' in schema and isinstance(schema['default'], dict):
-            schema['properties'] = {
-                key: {"type": "string", "default": value}
-                for key, value in schema['default'].items()
-            }
-        else:
-            schema['properties'] = {}
-    elif schema.get('type') == 'array' and not ('items' in schema):
-        if 'default' in schema and isinstance(schema['default'], (tuple, list)):
-            schema['items'] = {'type': 'string', 'default': schema['default']}
-        else:
-            schema['items'] = {'type': 'string', 'default': []}
-
-    # recursive case: iterate through all values and process any sub-objects
-    for key, value in schema.items():
-        if isinstance(value, dict):
-            patch_schema_for_jsonform(value)
+    """patch a schema dictionary in-place to fix any missing properties/keys on objects (walks nested dicts with a stack instead of recursing)"""
+
+    stack = [schema]
+    while stack:
+        subschema = stack.pop()
+
+        # schema is type: "object" with no properties/keys
+        if subschema.get('type') == 'object' and not ('properties' in subschema or 'keys' in subschema):
+            if 'default' in subschema and isinstance(subschema['default'], dict):
+                subschema['properties'] = {
+                    key: {"type": "string", "default": value}
+                    for key, value in subschema['default'].items()
+                }
+            else:
+                subschema['properties'] = {}
+        elif subschema.get('type') == 'array' and not ('items' in subschema):
+            if 'default' in subschema and isinstance(subschema['default'], (tuple, list)):
+                subschema['items'] = {'type': 'string', 'default': subschema['default']}
+            else:
+                subschema['items'] = {'type': 'string', 'default': []}
+
+        # queue up all sub-objects to be processed next
+        stack.extend(value for value in subschema.values() if isinstance(value, dict))
 
 
 
 class PatchedJSONFormWidget(JSONFormWidget):
+    _patched_schema = None
+
     def get_schema(self):
         self.schema = super().get_schema()
-        patch_schema_for_jsonform(self.schema)
+        if self.schema is not self._patched_schema:
+            # only walk+patch each schema dict once, re-renders of the same field get the already-patched dict back
+            patch_schema_for_jsonform(self.schema)
+            self._patched_schema = self.schema
         return self.schema
 
 
@@ -0,0 +1,20 @@
+import django.core.serializers.json
+import django_pydantic_field.fields
+import project.models
+import pydantic_pkgr.binprovider
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0002_alter_dependency_options_dependency_min_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dependency',
+            name='default_binprovider',
+            field=django_pydantic_field.fields.PydanticSchemaField(config=None, default=project.models.get_default_binprovider, encoder=django.core.serializers.json.DjangoJSONEncoder, schema=pydantic_pkgr.binprovider.BinProvider),
+        ),
+    ]
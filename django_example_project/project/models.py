@@ -4,7 +4,8 @@ from django_pydantic_field import SchemaField
 from pydantic_pkgr import BinProvider, EnvProvider, Binary, SemVer
 
 
-DEFAULT_PROVIDER = EnvProvider()
+def get_default_binprovider() -> BinProvider:
+    return EnvProvider()
 
 
 class Dependency(models.Model):
@@ -12,7 +13,7 @@ class Dependency(models.Model):
 
     label = models.CharField(max_length=63)
 
-    default_binprovider: BinProvider = SchemaField(default=DEFAULT_PROVIDER)
+    default_binprovider: BinProvider = SchemaField(default=get_default_binprovider)
 
     binaries: list[Binary] = SchemaField(default=[])
 
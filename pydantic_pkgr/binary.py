@@ -1,19 +1,20 @@
 __package__ = 'pydantic_pkgr'
 
+import os
 import sys
 import inspect
-import importlib
 from pathlib import Path
+from functools import cache, lru_cache
 
 
-from typing import Any, Optional, Dict, List, Iterable
+from typing import Any, Optional, Dict, List, Tuple, Iterable
 from typing_extensions import Self
 from subprocess import run, PIPE, CompletedProcess
 
 
 from pydantic_core import ValidationError
 
-from pydantic import BaseModel, Field, model_validator, computed_field, field_validator, validate_call, field_serializer, ConfigDict
+from pydantic import BaseModel, Field, PrivateAttr, model_validator, computed_field, field_validator, field_serializer, ConfigDict
 
 from .semver import SemVer
 from .binprovider import (
@@ -28,23 +29,27 @@ from .binprovider import (
     BrewProvider,
     PipProvider,
     ProviderLookupDict,
+    provider_func_ref,
     bin_name,
     bin_abspath,
     bin_abspaths,
+    split_PATH,
     path_is_script,
     path_is_executable,
 )
 
-DEFAULT_PROVIDER = EnvProvider()
-
+@lru_cache(maxsize=256)
+def parse_semver_str(version: str) -> SemVer | None:
+    # the same handful of version strings get parsed over and over again, SemVer is an immutable tuple so it's safe to share
+    return SemVer(version) if version else None
 
 class Binary(ShallowBinary):
-    model_config = ConfigDict(extra='ignore', populate_by_name=True, validate_defaults=True)
+    model_config = ConfigDict(extra='ignore', populate_by_name=True)
 
     name: BinName = ''
     description: str = ''
 
-    providers_supported: List[BinProvider] = Field(default=[DEFAULT_PROVIDER], alias='providers')
+    providers_supported: List[BinProvider] = Field(default_factory=lambda: [EnvProvider()], alias='providers')   # each Binary gets its own, providers are mutable
     provider_overrides: Dict[BinProviderName, ProviderLookupDict] = Field(default={}, alias='overrides')
     
     loaded_provider: Optional[BinProviderName] = Field(default=None, alias='provider')
@@ -56,6 +61,11 @@ class Binary(ShallowBinary):
     # is_script
     # is_valid: see below
 
+    # (cache_key, result) of the last loaded_abspaths PATH scan, see clear_cache()
+    _loaded_abspaths_cache: Optional[Tuple[tuple, Dict[BinProviderName, List[HostBinPath]]]] = PrivateAttr(default=None)
+    # (name, loaded_abspath, loaded_version) that is_valid last returned True for, see _cached_is_valid()
+    _is_valid_for: Optional[tuple] = PrivateAttr(default=None)
+
 
     @model_validator(mode='after')
     def validate(self):
@@ -77,17 +87,24 @@ class Binary(ShallowBinary):
 
     @field_validator('loaded_abspath', mode='before')
     def parse_abspath(cls, value: Any):
+        if not value:
+            return None
         return bin_abspath(value)
 
     @field_validator('loaded_version', mode='before')
     def parse_version(cls, value: Any):
+        if isinstance(value, SemVer):
+            # already parsed (e.g. copied over from a ShallowBinary), skip re-running the version string parser
+            return value
+        if isinstance(value, str):
+            return parse_semver_str(value)
         return value and SemVer(value)
 
     @field_serializer('provider_overrides', when_used='json')
     def serialize_overrides(self, provider_overrides: Dict[BinProviderName, ProviderLookupDict]) -> Dict[BinProviderName, Dict[str, str]]:
         return {
             provider_name: {
-                key: str(val)
+                key: provider_func_ref(val)
                 for key, val in overrides.items()
             }
             for provider_name, overrides in provider_overrides.items()
@@ -97,179 +114,205 @@ class Binary(ShallowBinary):
     @property
     def loaded_abspaths(self) -> Dict[BinProviderName, List[HostBinPath]]:
         assert self.loaded_abspath, 'Binary must be loaded before getting abspath list'
+
+        # scanning every provider's PATH is expensive and this gets accessed on every dump, so reuse the
+        # last result as long as the loaded bin and providers' PATHs are unchanged (call clear_cache() to force a rescan)
+        cache_key = (self.name, self.loaded_provider, self.loaded_abspath, tuple(provider.PATH for provider in self.providers_supported))
+        if self._loaded_abspaths_cache and self._loaded_abspaths_cache[0] == cache_key:
+            # hand out copies so callers that modify the result can't corrupt the cache
+            return {provider_name: list(abspaths) for provider_name, abspaths in self._loaded_abspaths_cache[1].items()}
+
         all_bin_abspaths = {self.loaded_provider: [self.loaded_abspath]} if self.loaded_provider  else {}
+        seen_abspaths = {provider_name: set(abspaths) for provider_name, abspaths in all_bin_abspaths.items()}
+        abspath_by_dir: Dict[str, HostBinPath | None] = {}    # providers often share PATH dirs, only search each dir once
         for provider in self.providers_supported:
             if not provider.PATH:
                 # print('skipping provider', provider.name, provider.PATH)
                 continue
-            for bin_abspath in bin_abspaths(self.name, PATH=provider.PATH):
-                existing = all_bin_abspaths.get(provider.name, [])
-                if bin_abspath not in existing:
-                    all_bin_abspaths[provider.name] = [
-                        *existing,
-                        bin_abspath,
-                    ]
-        return all_bin_abspaths
+            seen = seen_abspaths.setdefault(provider.name, set())
+            for bin_dir in split_PATH(provider.PATH):
+                if bin_dir not in abspath_by_dir:
+                    abspath_by_dir[bin_dir] = next(iter(bin_abspaths(self.name, PATH=bin_dir)), None)
+                bin_abspath = abspath_by_dir[bin_dir]
+                if bin_abspath and bin_abspath not in seen:
+                    seen.add(bin_abspath)
+                    all_bin_abspaths.setdefault(provider.name, []).append(bin_abspath)
+
+        self._loaded_abspaths_cache = (cache_key, all_bin_abspaths)
+        return {provider_name: list(abspaths) for provider_name, abspaths in all_bin_abspaths.items()}
+
+    def clear_cache(self) -> None:
+        """forget the cached loaded_abspaths scan, abspath stat and is_valid check, e.g. after installing/removing a copy of the binary on one of the PATHs"""
+        super().clear_cache()
+        self._loaded_abspaths_cache = None
+        self._is_valid_for = None
     
 
     @computed_field
     @property
     def loaded_bin_dirs(self) -> Dict[BinProviderName, BinDirPath]:
         return {
-            provider_name: ':'.join([str(bin_abspath.parent) for bin_abspath in bin_abspaths])
+            provider_name: ':'.join(dict.fromkeys(os.path.dirname(bin_abspath) for bin_abspath in bin_abspaths))   # dedupe, keeping order
             for provider_name, bin_abspaths in self.loaded_abspaths.items()
         }
 
-    @validate_call
+    def _cached_is_valid(self) -> bool:
+        """is_valid, but skips re-checking the abspath on disk if it already passed for the same name/abspath/version"""
+        valid_for = (self.name, self.loaded_abspath, self.loaded_version)
+        if self._is_valid_for == valid_for:
+            return True
+        if self.is_valid:
+            self._is_valid_for = valid_for
+            return True
+        return False
+
+    def _copy_with_loaded(self, installed_bin: ShallowBinary) -> Self:
+        loaded_bin = self.model_copy(update={
+            'loaded_provider': installed_bin.loaded_provider,
+            'loaded_abspath': installed_bin.loaded_abspath,
+            'loaded_version': installed_bin.loaded_version,
+        })
+        loaded_bin.clear_cache()    # the memoized stat/PATH scan/is_valid results copied over were for the old loaded state
+        return loaded_bin
+
     def install(self) -> Self:
         assert self.name, f'No binary name was provided! {self}'
 
         if not self.providers_supported:
             return self
 
-        outer_exc = Exception(f'None of the configured providers [{", ".join(p.name for p in self.providers_supported)}] were able to install binary: {self.name}')
         inner_exc = Exception('No providers were available')
         for provider in self.providers_supported:
             try:
                 installed_bin = provider.install(self.name, overrides=self.provider_overrides.get(provider.name))
                 if installed_bin:
                     # print('INSTALLED', self.name, installed_bin)
-                    return self.model_copy(update=installed_bin.model_dump(exclude=('providers_supported',)))
+                    return self._copy_with_loaded(installed_bin)
             except Exception as err:
                 # print(err)
                 inner_exc = err
-        raise outer_exc from inner_exc
+        raise Exception(f'None of the configured providers [{", ".join(p.name for p in self.providers_supported)}] were able to install binary: {self.name}') from inner_exc
 
-    @validate_call
     def load(self, cache=True) -> Self:
         assert self.name, f'No binary name was provided! {self}'
 
-        if self.is_valid:
+        if self._cached_is_valid():
             return self
 
         if not self.providers_supported:
             return self
 
-        outer_exc = Exception(f'None of the configured providers [{", ".join(p.name for p in self.providers_supported)}] were able to load binary: {self.name}')
         inner_exc = Exception('No providers were available')
         for provider in self.providers_supported:
             try:
                 installed_bin = provider.load(self.name, cache=cache, overrides=self.provider_overrides.get(provider.name))
                 if installed_bin:
                     # print('LOADED', provider, self.name, installed_bin)
-                    return self.model_copy(update=installed_bin.model_dump(exclude=('providers_supported',)))
+                    return self._copy_with_loaded(installed_bin)
             except Exception as err:
                 # print(err)
                 inner_exc = err
-        raise outer_exc from inner_exc
+        raise Exception(f'None of the configured providers [{", ".join(p.name for p in self.providers_supported)}] were able to load binary: {self.name}') from inner_exc
 
-    @validate_call
     def load_or_install(self, cache=True) -> Self:
         assert self.name, f'No binary name was provided! {self}'
 
-        if self.is_valid:
+        if self._cached_is_valid():
             return self
 
         if not self.providers_supported:
             return self
 
-        outer_exc = Exception(f'None of the configured providers [{", ".join(p.name for p in self.providers_supported)}] were able to find or install binary: {self.name}')
         inner_exc = Exception('No providers were available')
         for provider in self.providers_supported:
             try:
                 installed_bin = provider.load_or_install(self.name, overrides=self.provider_overrides.get(provider.name), cache=cache)
                 if installed_bin:
                     # print('LOADED_OR_INSTALLED', self.name, installed_bin)
-                    return self.model_copy(update=installed_bin.model_dump(exclude=('providers_supported',)))
+                    return self._copy_with_loaded(installed_bin)
             except Exception as err:
                 # print(err)
                 inner_exc = err
-        raise outer_exc from inner_exc
+        raise Exception(f'None of the configured providers [{", ".join(p.name for p in self.providers_supported)}] were able to find or install binary: {self.name}') from inner_exc
 
 
-class SystemPythonHelpers:
-    @staticmethod
-    def get_subdeps() -> str:
-        return 'python3 python3-minimal python3-pip python3-virtualenv'
+def get_python_subdeps() -> str:
+    return 'python3 python3-minimal python3-pip python3-virtualenv'
+
+def get_python_abspath() -> str:
+    return sys.executable
+
+def get_python_version() -> str:
+    return '{}.{}.{}'.format(*sys.version_info[:3])
+
+
+@cache
+def get_sqlite_abspath() -> Path:
+    import sqlite3
+    return Path(inspect.getfile(sqlite3))
+
+@cache
+def get_sqlite_version() -> SemVer:
+    import sqlite3
+    version = sqlite3.version
+    assert version
+    return SemVer(version)
+
+
+def get_django_abspath() -> str:
+    import django
+    return inspect.getfile(django)
+
+def get_django_version() -> str:
+    import django
+    return '{}.{}.{} {} ({})'.format(*django.VERSION)
 
-    @staticmethod
-    def get_abspath() -> str:
-        return sys.executable
-    
-    @staticmethod
-    def get_version() -> str:
-        return '{}.{}.{}'.format(*sys.version_info[:3])
-
-
-class SqliteHelpers:
-    @staticmethod
-    def get_abspath() -> Path:
-        import sqlite3
-        importlib.reload(sqlite3)
-        return Path(inspect.getfile(sqlite3))
-
-    @staticmethod
-    def get_version() -> SemVer:
-        import sqlite3
-        importlib.reload(sqlite3)
-        version = sqlite3.version
-        assert version
-        return SemVer(version)
-
-class DjangoHelpers:
-    @staticmethod
-    def get_django_abspath() -> str:
-        import django
-        return inspect.getfile(django)
-    
 
-    @staticmethod
-    def get_django_version() -> str:
-        import django
-        return '{}.{}.{} {} ({})'.format(*django.VERSION)
+def get_ytdlp_subdeps() -> str:
+    return 'yt-dlp ffmpeg'
 
-class YtdlpHelpers:
-    @staticmethod
-    def get_ytdlp_subdeps() -> str:
-        return 'yt-dlp ffmpeg'
+@cache
+def get_ytdlp_version() -> str:
+    import yt_dlp
 
-    @staticmethod
-    def get_ytdlp_version() -> str:
-        import yt_dlp
-        importlib.reload(yt_dlp)
+    version = yt_dlp.version.__version__
+    assert version
+    return version
 
-        version = yt_dlp.version.__version__
-        assert version
-        return version
+def invalidate_ytdlp_version() -> None:
+    """forget the cached yt-dlp version, e.g. after upgrading it with pip in the same process"""
+    get_ytdlp_version.cache_clear()
+    for module_name in [name for name in sys.modules if name == 'yt_dlp' or name.startswith('yt_dlp.')]:
+        del sys.modules[module_name]
 
 class PythonBinary(Binary):
     name: BinName = 'python'
 
-    providers_supported: List[BinProvider] = [
+    providers_supported: List[BinProvider] = Field(default_factory=lambda: [
         EnvProvider(
-            subdeps_provider={'python': 'plugantic.binaries.SystemPythonHelpers.get_subdeps'},
-            abspath_provider={'python': 'plugantic.binaries.SystemPythonHelpers.get_abspath'},
-            version_provider={'python': 'plugantic.binaries.SystemPythonHelpers.get_version'},
+            subdeps_provider={'python': get_python_subdeps},
+            abspath_provider={'python': get_python_abspath},
+            version_provider={'python': get_python_version},
         ),
-    ]
+    ], alias='providers')
 
 class SqliteBinary(Binary):
     name: BinName = 'sqlite'
-    providers_supported: List[BinProvider] = [
+    providers_supported: List[BinProvider] = Field(default_factory=lambda: [
         EnvProvider(
-            version_provider={'sqlite': 'plugantic.binaries.SqliteHelpers.get_version'},
-            abspath_provider={'sqlite': 'plugantic.binaries.SqliteHelpers.get_abspath'},
+            version_provider={'sqlite': get_sqlite_version},
+            abspath_provider={'sqlite': get_sqlite_abspath},
         ),
-    ]
+    ], alias='providers')
 
 class DjangoBinary(Binary):
     name: BinName = 'django'
-    providers_supported: List[BinProvider] = [
+    providers_supported: List[BinProvider] = Field(default_factory=lambda: [
         EnvProvider(
-            abspath_provider={'django': 'plugantic.binaries.DjangoHelpers.get_django_abspath'},
-            version_provider={'django': 'plugantic.binaries.DjangoHelpers.get_django_version'},
+            abspath_provider={'django': get_django_abspath},
+            version_provider={'django': get_django_version},
         ),
-    ]
+    ], alias='providers')
 
 
 
@@ -277,17 +320,17 @@ class DjangoBinary(Binary):
 
 class YtdlpBinary(Binary):
     name: BinName = 'yt-dlp'
-    providers_supported: List[BinProvider] = [
+    providers_supported: List[BinProvider] = Field(default_factory=lambda: [
         # EnvProvider(),
-        PipProvider(version_provider={'yt-dlp': 'plugantic.binaries.YtdlpHelpers.get_ytdlp_version'}),
-        BrewProvider(subdeps_provider={'yt-dlp': 'plugantic.binaries.YtdlpHelpers.get_ytdlp_subdeps'}),
+        PipProvider(version_provider={'yt-dlp': get_ytdlp_version}),
+        BrewProvider(subdeps_provider={'yt-dlp': get_ytdlp_subdeps}),
         # AptProvider(subdeps_provider={'yt-dlp': lambda: 'yt-dlp ffmpeg'}),
-    ]
+    ], alias='providers')
 
 
 class WgetBinary(Binary):
     name: BinName = 'wget'
-    providers_supported: List[BinProvider] = [EnvProvider(), AptProvider()]
+    providers_supported: List[BinProvider] = Field(default_factory=lambda: [EnvProvider(), AptProvider()], alias='providers')
 
 
 # if __name__ == '__main__':
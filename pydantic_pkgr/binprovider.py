@@ -1,18 +1,24 @@
 import os
+import re
 import sys
+import time
 import shutil
 import operator
 import site
 import sysconfig
+from types import MappingProxyType
 
-from typing import Callable, Iterable, Any, Optional, Type, List, Dict, Annotated, ClassVar, Literal, cast, TYPE_CHECKING
+from typing import Callable, Iterable, Any, Optional, Type, List, Dict, Tuple, Annotated, ClassVar, Literal, cast, TYPE_CHECKING
 from typing_extensions import Self
+from stat import S_ISREG, S_ISDIR
+from functools import lru_cache
+from importlib import import_module
 from collections import namedtuple
 from pathlib import Path
 from subprocess import run, PIPE, CompletedProcess
 
 from pydantic_core import core_schema, ValidationError
-from pydantic import BaseModel, Field, TypeAdapter, AfterValidator, BeforeValidator, validate_call, GetCoreSchemaHandler, ConfigDict, computed_field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter, AfterValidator, BeforeValidator, validate_call, GetCoreSchemaHandler, ConfigDict, computed_field, field_validator, field_serializer
 
 
 def validate_bin_provider_name(name: str) -> str:
@@ -36,57 +42,83 @@ def validate_bin_dir(path: Path) -> Path:
 
 BinDirPath = Annotated[Path, AfterValidator(validate_bin_dir)]
 
+@lru_cache(maxsize=64)
+def split_PATH(PATH: str) -> Tuple[str, ...]:
+    """split a $PATH str into its dirs, dropping empty entries e.g. from 'a::b' or a trailing ':' (cached, the same few PATHs get split constantly)"""
+    return tuple(bin_dir for bin_dir in PATH.split(':') if bin_dir)
+
 def validate_PATH(PATH: str | List[str]) -> str:
-    paths = PATH.split(':') if isinstance(PATH, str) else list(PATH)
-    assert all(Path(bin_dir) for bin_dir in paths)
+    paths = split_PATH(PATH) if isinstance(PATH, str) else (bin_dir for bin_dir in PATH if bin_dir)
     return ':'.join(paths)
 
 PATHStr = Annotated[str, BeforeValidator(validate_PATH)]
+_PATH_STR_ADAPTER = TypeAdapter(PATHStr)
 
 def func_takes_args_or_kwargs(lambda_func: Callable[..., Any]) -> bool:
     """returns True if a lambda func takes args/kwargs of any kind, otherwise false if it's pure/argless"""
-    code = lambda_func.__code__
+    code = getattr(lambda_func, '__wrapped__', lambda_func).__code__   # look through @cache/@lru_cache wrappers
     has_args = code.co_argcount > 0
     has_varargs = code.co_flags & 0x04 != 0
     has_varkw = code.co_flags & 0x08 != 0
     return has_args or has_varargs or has_varkw
 
 
-@validate_call
-def bin_name(bin_path_or_name: str | Path) -> str:
+_BIN_NAME_CHARS_RE = re.compile(r'[\w.-]+')
+_SEMVER_RE = re.compile(r'\b\d+\.\d+(?:\.\d+)?\b')
+
+@lru_cache(maxsize=2048)
+def _bin_name_impl(bin_path_or_name: str) -> str:
     name = Path(bin_path_or_name).name
     assert 1 <= len(name) < 64, 'Binary names must be between 1 and 63 characters long'
-    assert name.replace('-', '').replace('_', '').replace('.', '').isalnum(), (
+    assert _BIN_NAME_CHARS_RE.fullmatch(name), (
         f'Binary name can only contain a-Z0-9-_.: {name}')
     assert name[0].isalpha(), 'Binary names must start with a letter'
     return name
 
+def bin_name(bin_path_or_name: str | Path) -> str:
+    # the set of distinct bin names seen at runtime is small, so repeat validations are just a cache hit
+    return _bin_name_impl(str(bin_path_or_name))
+
 BinName = Annotated[str, AfterValidator(bin_name)]
 
-@validate_call
+def _stat_file(path: Path | str) -> os.stat_result | None:
+    """stat a path once and return the result only if it's a regular file, so callers can check mode bits without re-stat'ing"""
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return st if S_ISREG(st.st_mode) else None
+
+def _stat_is_executable(path: Path | str, st: os.stat_result) -> bool:
+    # an x bit for *someone* is cheap to check on the stat we already have, but only os.access() knows if the
+    # current user can actually run it (owner/group/other bits, supplementary groups, ACLs, root, etc.)
+    return bool(st.st_mode & 0o111) and os.access(path, os.X_OK)
+
 def path_is_file(path: Path | str) -> Path:
     path = Path(path) if isinstance(path, str) else path
-    assert path.is_file(), f'Path is not a file: {path}'
+    assert _stat_file(path), f'Path is not a file: {path}'
     return path
 
 HostExistsPath = Annotated[Path, AfterValidator(path_is_file)]
 
-@validate_call
 def path_is_executable(path: HostExistsPath) -> HostExistsPath:
-    assert os.access(path, os.X_OK), f'Path is not executable (fix by running chmod +x {path})'
+    path = Path(path) if isinstance(path, str) else path
+    st = _stat_file(path)
+    assert st, f'Path is not a file: {path}'
+    assert _stat_is_executable(path, st), f'Path is not executable (fix by running chmod +x {path})'
     return path
 
-@validate_call
+SCRIPT_EXTENSIONS = ('.py', '.js', '.sh')
+
 def path_is_script(path: HostExistsPath) -> HostExistsPath:
-    SCRIPT_EXTENSIONS = ('.py', '.js', '.sh')
+    path = Path(path) if isinstance(path, str) else path
     assert path.suffix.lower() in SCRIPT_EXTENSIONS, 'Path is not a script (does not end in {})'.format(', '.join(SCRIPT_EXTENSIONS))
-    return path
+    return path_is_file(path)   # check the extension first, it's free compared to a stat() call
 
 HostExecutablePath = Annotated[HostExistsPath, AfterValidator(path_is_executable)]
 
-@validate_call
 def path_is_abspath(path: Path) -> Path:
-    path = path.expanduser().absolute()   # resolve ~/ -> /home/<username/ and ../../
+    path = Path(path).expanduser().absolute()   # resolve ~/ -> /home/<username/ and ../../
     assert path.resolve()                 # make sure symlinks can be resolved, but dont return resolved link
     return path
 
@@ -94,70 +126,96 @@ HostAbsPath = Annotated[HostExistsPath, AfterValidator(path_is_abspath)]
 HostBinPath = Annotated[HostExistsPath, AfterValidator(path_is_abspath)] # removed: AfterValidator(path_is_executable)
 # not all bins need to be executable to be bins, some are scripts
 
-@validate_call
+def _is_executable_file(path: Path | str) -> bool:
+    st = _stat_file(path)
+    return bool(st and _stat_is_executable(path, st))
+
+def _scan_bin_dir(bin_dir: str) -> Dict[str, str]:
+    """{filename: path} for every file in a $PATH dir"""
+    try:
+        with os.scandir(bin_dir) as entries:
+            return {entry.name: entry.path for entry in entries if entry.is_file()}
+    except OSError:
+        return {}
+
+@lru_cache(maxsize=256)
+def _bin_dir_index(bin_dir: str, mtime_ns: int) -> Dict[str, str]:
+    """_scan_bin_dir() cached until the dir's mtime changes (i.e. an entry is added/removed/renamed)"""
+    return _scan_bin_dir(bin_dir)
+
+# many filesystems only store mtimes with a granularity of up to ~1s (HFS+, ext4/xfs on older kernels, NFS attr caching),
+# so an entry added within the same tick as a scan wouldn't change the mtime, don't trust the mtime of recently modified dirs
+_RACY_MTIME_NS = 2_000_000_000
+
+def _get_bin_dir_index(bin_dir: str) -> Dict[str, str]:
+    try:
+        st = os.stat(bin_dir)
+    except (OSError, ValueError):
+        return {}
+    if not S_ISDIR(st.st_mode):
+        return {}
+    if time.time_ns() - st.st_mtime_ns < _RACY_MTIME_NS:
+        return _scan_bin_dir(bin_dir)
+    return _bin_dir_index(bin_dir, st.st_mtime_ns)
+
+# building a TypeAdapter compiles a new pydantic-core validator, so build it once and reuse it
+_HOST_BIN_PATH_ADAPTER = TypeAdapter(HostBinPath)
+
 def bin_abspath(bin_path_or_name: BinName | Path, PATH: PATHStr | None=None) -> HostBinPath | None:
     assert bin_path_or_name
+    if str(bin_path_or_name).startswith('/'):
+        # already an absolute path, no need to look at $PATH at all
+        abspath = Path(bin_path_or_name)
+        return abspath if _stat_file(abspath) else None
+
+    try:
+        name = bin_name(bin_path_or_name)
+    except AssertionError:
+        return None     # not a valid bin name (e.g. node@18), so it can't be on $PATH either
     if PATH is None:
         PATH = os.environ.get('PATH', '/bin')
     if PATH:
-        PATH = str(PATH)
+        PATH = validate_PATH(PATH)
     else:
         return None
 
-    if str(bin_path_or_name).startswith('/'):
-        # already a path, get its absolute form
-        abspath = Path(bin_path_or_name).expanduser().absolute()
-    else:
-        # not a path yet, get path using shutil.which
-        binpath = shutil.which(bin_path_or_name, mode=os.X_OK, path=PATH)
-        # print(bin_path_or_name, PATH.split(':'), binpath, 'GOPINGNGN')
-        if not binpath:
-            # some bins dont show up with shutil.which (e.g. django-admin.py)
-            for path in PATH.split(':'):
-                bin_dir = Path(path)
-                # print('BIN_DIR', bin_dir, bin_dir.is_dir())
-                if not bin_dir.is_dir():
-                    # raise Exception(f'Found invalid dir in $PATH: {bin_dir}')
-                    continue
-                bin_file = bin_dir / bin_path_or_name
-                # print(bin_file, path, bin_file.exists(), bin_file.is_file(), bin_file.is_symlink())
-                if bin_file.exists():
-                    return bin_file
-
-            return None
-        # print(binpath, PATH)
-        if str(Path(binpath).parent) not in PATH:
-            # print('WARNING, found bin but not in PATH', binpath, PATH)
-            # found bin but it was outside our search $PATH
-            return None
-        abspath = Path(binpath).expanduser().absolute()
-
-    try:
-        return TypeAdapter(HostBinPath).validate_python(abspath)
-    except ValidationError:
+    # not a path yet, look it up in the cached file listing of each dir in $PATH
+    candidates = [
+        bin_dir_index[name]
+        for bin_dir_index in map(_get_bin_dir_index, split_PATH(PATH))
+        if name in bin_dir_index
+    ]
+    binpath = next((candidate for candidate in candidates if _is_executable_file(candidate)), None)
+    if binpath:
+        return Path(binpath).absolute()   # already stat'ed above, no need to validate as HostBinPath again
+
+    # some bins aren't marked executable (e.g. django-admin.py), fall back to the first file with a matching name
+    if not candidates:
         return None
+    abspath = Path(candidates[0]).absolute()
+    return abspath if _stat_file(abspath) else None
 
-@validate_call
 def bin_abspaths(bin_path_or_name: BinName | Path, PATH: PATHStr | None=None) -> List[HostBinPath]:
     assert bin_path_or_name
+    if str(bin_path_or_name).startswith('/'):
+        # already an absolute path, no need to look at $PATH at all
+        abspath = Path(bin_path_or_name)
+        return [abspath] if _stat_file(abspath) else []
 
-    PATH = PATH or os.environ.get('PATH', '/bin')
+    try:
+        name = bin_name(bin_path_or_name)
+    except AssertionError:
+        return []       # not a valid bin name (e.g. node@18), so it can't be on $PATH either
+    PATH = validate_PATH(PATH or os.environ.get('PATH', '/bin'))
     abspaths = []
 
-    if str(bin_path_or_name).startswith('/'):
-        # already a path, get its absolute form
-        abspaths.append(Path(bin_path_or_name).expanduser().absolute())
-    else:
-        # not a path yet, get path using shutil.which
-        for path in PATH.split(':'):
-            binpath = shutil.which(bin_path_or_name, mode=os.X_OK, path=path)
-            if binpath and str(Path(binpath).parent) in PATH:
-                abspaths.append(binpath)
+    # not a path yet, look it up in the cached file listing of each dir in $PATH
+    for bin_dir in split_PATH(PATH):
+        binpath = _get_bin_dir_index(bin_dir).get(name)
+        if binpath and _is_executable_file(binpath):   # already stat'ed, no need to validate as HostBinPath again
+            abspaths.append(Path(binpath).absolute())
 
-    try:
-        return TypeAdapter(List[HostBinPath]).validate_python(abspaths)
-    except ValidationError:
-        return []
+    return abspaths
 
 
 @validate_call
@@ -170,7 +228,7 @@ class ShallowBinary(BaseModel):
     Shallow version of Binary used as a return type for BinProvider methods (e.g. load_or_install()).
     (doesn't implement full Binary interface, but can be used to populate a full loaded Binary instance)
     """
-    model_config = ConfigDict(extra='ignore', populate_by_name=True, validate_defaults=True)
+    model_config = ConfigDict(extra='ignore', populate_by_name=True)
 
     name: BinName = ''
 
@@ -180,6 +238,24 @@ class ShallowBinary(BaseModel):
     loaded_abspath: HostBinPath = Field(alias='abspath')
     loaded_version: SemVer = Field(alias='version')
 
+    # (loaded_abspath, st_mode, executable by us) from the last stat, so the computed fields below don't each re-stat the same file
+    _loaded_abspath_stat: Optional[Tuple[Path | str, int | None, bool]] = PrivateAttr(default=None)
+
+    def _loaded_abspath_info(self) -> Tuple[int | None, bool]:
+        if not self.loaded_abspath:
+            return None, False
+        if self._loaded_abspath_stat and self._loaded_abspath_stat[0] == self.loaded_abspath:
+            return self._loaded_abspath_stat[1], self._loaded_abspath_stat[2]
+        st = _stat_file(self.loaded_abspath)
+        mode = st.st_mode if st else None
+        executable = bool(st and _stat_is_executable(self.loaded_abspath, st))
+        self._loaded_abspath_stat = (self.loaded_abspath, mode, executable)
+        return mode, executable
+
+    def clear_cache(self) -> None:
+        """forget the memoized stat of loaded_abspath, e.g. after the file was replaced or chmod'ed in place"""
+        self._loaded_abspath_stat = None
+
     @computed_field                                                                                           # type: ignore[misc]  # see mypy issue #1362
     @property
     def bin_filename(self) -> BinName:
@@ -197,20 +273,16 @@ class ShallowBinary(BaseModel):
     @computed_field                                                                                           # type: ignore[misc]  # see mypy issue #1362
     @property
     def is_executable(self) -> bool:
-        try:
-            assert self.loaded_abspath and path_is_executable(self.loaded_abspath)
-            return True
-        except (ValidationError, AssertionError):
-            return False
+        return self._loaded_abspath_info()[1]
 
     @computed_field                                                                                           # type: ignore[misc]  # see mypy issue #1362
     @property
     def is_script(self) -> bool:
-        try:
-            assert self.loaded_abspath and path_is_script(self.loaded_abspath)
-            return True
-        except (ValidationError, AssertionError):
-            return False
+        return bool(
+            self.loaded_abspath
+            and Path(self.loaded_abspath).suffix.lower() in SCRIPT_EXTENSIONS   # check the extension first, it's free compared to a stat() call
+            and self._loaded_abspath_info()[0]
+        )
 
     @computed_field                                                                                           # type: ignore[misc]  # see mypy issue #1362
     @property
@@ -227,7 +299,9 @@ class ShallowBinary(BaseModel):
     def bin_dir(self) -> BinDirPath | None:
         if not self.loaded_abspath:
             return None
-        return TypeAdapter(BinDirPath).validate_python(self.loaded_abspath.parent)
+        # the parent of an existing absolute file is always an existing absolute dir, no need to re-validate it as a BinDirPath
+        abspath = Path(self.loaded_abspath)
+        return abspath.parent if abspath.is_absolute() else None
 
     @computed_field
     @property
@@ -240,7 +314,8 @@ class ShallowBinary(BaseModel):
         if bin_name == self.name:
             assert self.loaded_abspath, 'Binary must have a loaded_abspath, make sure to load_or_install() first'
             assert self.loaded_version, 'Binary must have a loaded_version, make sure to load_or_install() first'
-        assert Path(cwd).is_dir(), f'cwd must be a valid directory: {cwd}'
+        # the default cwd='.' always exists for the current process, only stat() dirs that were passed in explicitly
+        assert str(cwd) == '.' or Path(cwd).is_dir(), f'cwd must be a valid directory: {cwd}'
         cmd = [str(bin_name), *(str(arg) for arg in cmd)]
         return run(cmd, stdout=PIPE, stderr=PIPE, text=True, cwd=str(cwd), **kwargs)
 
@@ -256,13 +331,48 @@ def is_valid_python_dotted_import(import_str: str) -> str:
     return import_str
 
 InstallStr = Annotated[str, AfterValidator(is_valid_install_string)]
+_INSTALL_STR_ADAPTER = TypeAdapter(InstallStr)
 
 LazyImportStr = Annotated[str, AfterValidator(is_valid_python_dotted_import)]
 
 ProviderHandler = Callable[..., Any] | Callable[[], Any]                               # must take no args [], or [bin_name: str, **kwargs]
 #ProviderHandlerStr = Annotated[str, AfterValidator(lambda s: s.startswith('self.'))]
 ProviderHandlerRef = LazyImportStr | ProviderHandler
-ProviderLookupDict = Dict[str, LazyImportStr]
+ProviderLookupDict = Dict[str, ProviderHandlerRef]
+
+
+@lru_cache(maxsize=1024)
+def _import_provider_func(provider_func: str) -> ProviderHandler:
+    """
+    import a provider func from a dotted import path, the same few paths get resolved on every provider call so cache them
+    e.g. 'abc.def.ghi' -> function ghi on module abc.def,  'abc.def.Ghi.jkl' -> attr jkl on class Ghi in module abc.def
+    """
+    module_path, _, attr_path = provider_func.rpartition('.')
+    while module_path:
+        try:
+            imported_module = import_module(module_path)
+        except ModuleNotFoundError as err:
+            if not (err.name and (module_path == err.name or module_path.startswith(f'{err.name}.'))):
+                raise   # the module exists but one of its own imports is missing
+            # not a module, it must be an attr on a parent module (e.g. a class)
+            module_path, _, parent_attr = module_path.rpartition('.')
+            attr_path = f'{parent_attr}.{attr_path}'
+            continue
+        return operator.attrgetter(attr_path)(imported_module)
+    raise ImportError(f'Could not find a module to import provider func from: {provider_func}')
+
+def provider_func_ref(provider_func: ProviderHandlerRef) -> str:
+    """dotted import path for a provider func, so it can be resolved again after being dumped to JSON and loaded back"""
+    if type(provider_func) is str:
+        return provider_func    # most handlers are already dotted-path strings
+    module, qualname = getattr(provider_func, '__module__', None), getattr(provider_func, '__qualname__', None)
+    if module and qualname and '<' not in qualname:
+        return f'{module}.{qualname}'
+    return str(provider_func)   # lambdas, closures, partials, etc. can't be imported by name
+
+
+_PROVIDER_HANDLER_ADAPTER = TypeAdapter(ProviderHandler)
+
 ProviderType = Literal['abspath', 'version', 'subdeps', 'install']
 
 
@@ -289,9 +399,24 @@ class BinProvider(BaseModel):
     subdeps_provider: ProviderLookupDict = Field(default={'*': 'self.on_get_subdeps'}, exclude=True)
     install_provider: ProviderLookupDict = Field(default={'*': 'self.on_install'}, exclude=True)
 
-    _abspath_cache: ClassVar = {}
-    _version_cache: ClassVar = {}
-    _install_cache: ClassVar = {}
+    @field_serializer('abspath_provider', 'version_provider', 'subdeps_provider', 'install_provider', when_used='json')
+    def serialize_provider_funcs(self, provider_lookup_dict: ProviderLookupDict) -> Dict[str, str]:
+        return {key: provider_func_ref(val) for key, val in provider_lookup_dict.items()}
+
+    # the PATH that setup_PATH() last added to sys.path
+    _setup_PATH_for: Optional[str] = PrivateAttr(default=None)
+
+    # shared by all providers, so keyed by (provider name, bin name) to keep e.g. apt's curl from shadowing brew's curl
+    _abspath_cache: ClassVar[Dict[Tuple[str, str], HostBinPath]] = {}
+    _version_cache: ClassVar[Dict[Tuple[str, str], SemVer]] = {}
+    _install_cache: ClassVar[Dict[Tuple[str, str], ShallowBinary]] = {}
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """forget every provider's cached abspaths/versions/installs, e.g. after something was installed or removed outside of pydantic_pkgr"""
+        cls._abspath_cache.clear()
+        cls._version_cache.clear()
+        cls._install_cache.clear()
 
     # def provider_version(self) -> SemVer | None:
     #     """Version of the actual underlying package manager (e.g. pip v20.4.1)"""
@@ -314,9 +439,15 @@ class BinProvider(BaseModel):
 
     @validate_call
     def exec(self, bin_name: BinName | HostBinPath, cmd: Iterable[str | Path | int | float | bool]=(), cwd: Path | str='.', **kwargs) -> CompletedProcess:
-        bin_name = self.get_abspath(bin_name) if isinstance(bin_name, str) else bin_name
+        return self._exec(bin_name, cmd=cmd, cwd=cwd, **kwargs)
+
+    def _exec(self, bin_name: BinName | HostBinPath, cmd: Iterable[str | Path | int | float | bool]=(), cwd: Path | str='.', **kwargs) -> CompletedProcess:
+        if isinstance(bin_name, str):
+            # absolute paths only need an existence check, not a trip through the provider's abspath handlers
+            bin_name = bin_abspath(bin_name) if bin_name.startswith('/') else self._get_abspath(bin_name)
         assert bin_name, f'Binary must have a reachable path, make sure to load_or_install() first: {bin_name}'
-        assert Path(cwd).is_dir(), f'cwd must be a valid directory: {cwd}'
+        # the default cwd='.' always exists for the current process, only stat() dirs that were passed in explicitly
+        assert str(cwd) == '.' or Path(cwd).is_dir(), f'cwd must be a valid directory: {cwd}'
         cmd = [str(bin_name), *(str(arg) for arg in cmd)]
         return run(cmd, stdout=PIPE, stderr=PIPE, text=True, cwd=str(cwd), **kwargs)
 
@@ -327,7 +458,7 @@ class BinProvider(BaseModel):
 
         if python_bin_dir not in PATH:
             PATH = ':'.join([python_bin_dir, *PATH.split(':')])
-        return TypeAdapter(PATHStr).validate_python(PATH)
+        return _PATH_STR_ADAPTER.validate_python(PATH)
 
     def get_default_providers(self):
         return self.get_providers_for_bin('*')
@@ -342,33 +473,13 @@ class BinProvider(BaseModel):
 
         # if provider_func is a dot-formatted import string, import the function
         if isinstance(provider_func, str):
-            try:
-                from django.utils.module_loading import import_string
-            except ImportError:
-                from importlib import import_module
-                import_string = import_module
-
-            package_name, module_name, classname, path = provider_func.split('.', 3)   # -> abc, def, ghi.jkl
-
-            # get .ghi.jkl nested attr present on module abc.def
-            imported_module = import_string(f'{package_name}.{module_name}.{classname}')
-            provider_func = operator.attrgetter(path)(imported_module)
-
-            # # abc.def.ghi.jkl  -> 1, 2, 3
-            # for idx in range(1, len(path)):
-            #     parent_path = '.'.join(path[:-idx])  # abc.def.ghi
-            #     try:
-            #         parent_module = import_string(parent_path)
-            #         provider_func = getattr(parent_module, path[-idx])
-            #     except AttributeError, ImportError:
-            #         continue
+            provider_func = _import_provider_func(provider_func)
 
         assert provider_func, (
             f'{self.__class__.__name__} provider func for {bin_name} was not a function or dotted-import path: {provider_func}')
 
-        return TypeAdapter(ProviderHandler).validate_python(provider_func)
+        return _PROVIDER_HANDLER_ADAPTER.validate_python(provider_func)
 
-    @validate_call
     def get_providers_for_bin(self, bin_name: str) -> ProviderLookupDict:
         providers_for_bin = {
             'abspath': self.abspath_provider.get(bin_name),
@@ -380,28 +491,28 @@ class BinProvider(BaseModel):
         
         return only_set_providers_for_bin
 
-    @validate_call
     def get_provider_for_action(self, bin_name: BinName, provider_type: ProviderType, default_provider: Optional[ProviderHandlerRef]=None, overrides: Optional[ProviderLookupDict]=None) -> ProviderHandler:
         """
         Get the provider func for a given key + Dict of provider callbacks + fallback default provider.
         e.g. get_provider_for_action(bin_name='yt-dlp', 'install', default_provider=self.on_install, ...) -> Callable
         """
 
-        provider_func_ref = (
+        # only look in the one lookup dict for this provider_type, instead of building all 4 via get_providers_for_bin() twice
+        provider_lookup_dict: ProviderLookupDict = getattr(self, f'{provider_type}_provider')
+        provider_ref = (
             (overrides or {}).get(provider_type)
-            or self.get_providers_for_bin(bin_name).get(provider_type)
-            or self.get_default_providers().get(provider_type)
+            or provider_lookup_dict.get(bin_name)
+            or provider_lookup_dict.get('*')
             or default_provider
         )
         # print('getting provider for action', bin_name, provider_type, provider_func)
 
-        provider_func = self.resolve_provider_func(provider_func_ref)
+        provider_func = self.resolve_provider_func(provider_ref)
 
         assert provider_func, f'No {self.name} provider func was found for {bin_name} in: {self.__class__.__name__}.'
 
         return provider_func
 
-    @validate_call
     def call_provider_for_action(self, bin_name: BinName, provider_type: ProviderType, default_provider: Optional[ProviderHandlerRef]=None, overrides: Optional[ProviderLookupDict]=None, **kwargs) -> Any:
         provider_func: ProviderHandler = self.get_provider_for_action(
             bin_name=bin_name,
@@ -409,6 +520,9 @@ class BinProvider(BaseModel):
             default_provider=default_provider,
             overrides=overrides,
         )
+        return self._call_provider_func(provider_func, bin_name, **kwargs)
+
+    def _call_provider_func(self, provider_func: ProviderHandler, bin_name: BinName, **kwargs) -> Any:
         if not func_takes_args_or_kwargs(provider_func):
             # if it's a pure argless lambdas, dont pass bin_path and other **kwargs
             provider_func_without_args = cast(Callable[[], Any], provider_func)
@@ -418,9 +532,12 @@ class BinProvider(BaseModel):
         return provider_func(bin_name, **kwargs)
 
     def setup_PATH(self):
-        for path in reversed(self.PATH.split(':')):
+        if self._setup_PATH_for == self.PATH:
+            return   # already done for this PATH, this gets called before every get_abspath() and install()
+        for path in reversed(split_PATH(self.PATH)):
             if path not in sys.path:
                 sys.path.insert(0, path)   # e.g. /opt/archivebox/bin:/bin:/usr/local/bin:...
+        self._setup_PATH_for = self.PATH
 
     def on_get_abspath(self, bin_name: BinName | HostBinPath, **context) -> HostBinPath | None:
         # print(f'[*] {self.__class__.__name__}: Getting abspath for {bin_name}...')
@@ -433,21 +550,29 @@ class BinProvider(BaseModel):
             return None
 
     def on_get_version(self, bin_name: BinName, abspath: Optional[HostBinPath]=None, **context) -> SemVer | None:
-        abspath = abspath or self._abspath_cache.get(bin_name) or self.get_abspath(bin_name)
+        abspath = abspath or self._abspath_cache.get((self.name, bin_name)) or self._get_abspath(bin_name)
         if not abspath: return None
 
         # print(f'[*] {self.__class__.__name__}: Getting version for {bin_name}...')
-        version_stdout_str = self.exec(bin_name=abspath, cmd=['--version']).stdout.strip()
+        proc = self._exec(bin_name=abspath, cmd=['--version'])
         try:
-            return SemVer.parse(version_stdout_str)
+            version = SemVer.parse(proc.stdout.strip())
         except ValidationError:
             raise
             return None
+        if not version and proc.returncode == 0:
+            # some bins print their version to stderr or after a banner line, look for anything version-like in the
+            # output we already have instead of giving up (but not if it failed, errors/usage text can contain numbers too)
+            version = SemVer.parse(proc.stderr.strip())
+            if not version:
+                match = _SEMVER_RE.search(proc.stdout) or _SEMVER_RE.search(proc.stderr)
+                version = match and SemVer.parse(match.group(0))
+        return version or None
 
     def on_get_subdeps(self, bin_name: BinName, **context) -> InstallStr:
         # print(f'[*] {self.__class__.__name__}: Getting subdependencies for {bin_name}')
         # ... subdependency calculation logic here
-        return TypeAdapter(InstallStr).validate_python(bin_name)
+        return _INSTALL_STR_ADAPTER.validate_python(bin_name)
 
 
     def on_install(self, bin_name: BinName, subdeps: Optional[InstallStr]=None, **context):
@@ -459,13 +584,21 @@ class BinProvider(BaseModel):
         # ... install logic here
         assert True
 
+    def _is_noop_install(self, install_func: ProviderHandler) -> bool:
+        """True if install_func is known not to install anything (e.g. a read-only provider's on_install)"""
+        return False
+
+    # the public methods below validate their args once, and then only call the unvalidated _-prefixed versions internally
+
     @validate_call
     def get_abspaths(self, bin_name: BinName) -> List[HostBinPath]:
         return bin_abspaths(bin_name, PATH=self.PATH)
 
-
     @validate_call
     def get_abspath(self, bin_name: BinName, overrides: Optional[ProviderLookupDict]=None) -> HostBinPath | None:
+        return self._get_abspath(bin_name, overrides=overrides)
+
+    def _get_abspath(self, bin_name: BinName, overrides: Optional[ProviderLookupDict]=None) -> HostBinPath | None:
         self.setup_PATH()
         abspath = self.call_provider_for_action(
             bin_name=bin_name,
@@ -475,12 +608,15 @@ class BinProvider(BaseModel):
         )
         if not abspath:
             return None
-        result = TypeAdapter(HostBinPath).validate_python(abspath)
-        self._abspath_cache[bin_name] = result
+        result = _HOST_BIN_PATH_ADAPTER.validate_python(abspath)
+        self._abspath_cache[(self.name, bin_name)] = result
         return result
 
     @validate_call
     def get_version(self, bin_name: BinName, abspath: Optional[HostBinPath]=None, overrides: Optional[ProviderLookupDict]=None) -> SemVer | None:
+        return self._get_version(bin_name, abspath=abspath, overrides=overrides)
+
+    def _get_version(self, bin_name: BinName, abspath: Optional[HostBinPath]=None, overrides: Optional[ProviderLookupDict]=None) -> SemVer | None:
         version = self.call_provider_for_action(
             bin_name=bin_name,
             provider_type='version',
@@ -491,11 +627,14 @@ class BinProvider(BaseModel):
         if not version:
             return None
         result = SemVer.parse(version)
-        self._version_cache[bin_name] = result
+        self._version_cache[(self.name, bin_name)] = result
         return result
 
     @validate_call
     def get_subdeps(self, bin_name: BinName, overrides: Optional[ProviderLookupDict]=None) -> InstallStr:
+        return self._get_subdeps(bin_name, overrides=overrides)
+
+    def _get_subdeps(self, bin_name: BinName, overrides: Optional[ProviderLookupDict]=None) -> InstallStr:
         subdeps = self.call_provider_for_action(
             bin_name=bin_name,
             provider_type='subdeps',
@@ -504,25 +643,33 @@ class BinProvider(BaseModel):
         )
         if not subdeps:
             subdeps = bin_name
-        result = TypeAdapter(InstallStr).validate_python(subdeps)
+        result = _INSTALL_STR_ADAPTER.validate_python(subdeps)
         return result
 
     @validate_call
     def install(self, bin_name: BinName, overrides: Optional[ProviderLookupDict]=None) -> ShallowBinary | None:
-        subdeps = self.get_subdeps(bin_name, overrides=overrides)
-        self.setup_PATH()
-        self.call_provider_for_action(
+        return self._install(bin_name, overrides=overrides)
+
+    def _install(self, bin_name: BinName, overrides: Optional[ProviderLookupDict]=None) -> ShallowBinary | None:
+        install_func = self.get_provider_for_action(
             bin_name=bin_name,
             provider_type='install',
             default_provider=self.on_install,
             overrides=overrides,
-            subdeps=subdeps,
         )
-
-        installed_abspath = self.get_abspath(bin_name)
+        # if the install handler wouldn't do anything, skip working out subdeps and wiping the shared caches,
+        # and just look for the bin on $PATH below
+        if not self._is_noop_install(install_func):
+            subdeps = self._get_subdeps(bin_name, overrides=overrides)
+            self.setup_PATH()
+            self._call_provider_func(install_func, bin_name, subdeps=subdeps)
+            # installing can add/replace/upgrade any number of bins (incl. subdeps) that other providers may have cached
+            self.clear_cache()
+
+        installed_abspath = self._get_abspath(bin_name)
         assert installed_abspath, f'Unable to find {bin_name} abspath after installing with {self.name}'
 
-        installed_version = self.get_version(bin_name, abspath=installed_abspath)
+        installed_version = self._get_version(bin_name, abspath=installed_abspath)
         assert installed_version, f'Unable to find {bin_name} version after installing with {self.name}'
         
         result = ShallowBinary(
@@ -532,27 +679,30 @@ class BinProvider(BaseModel):
             loaded_version=installed_version,
             providers_supported=[self],
         )
-        self._install_cache[bin_name] = result
+        self._install_cache[(self.name, bin_name)] = result
         return result
 
     @validate_call
     def load(self, bin_name: BinName, overrides: Optional[ProviderLookupDict]=None, cache: bool=False) -> ShallowBinary | None:
+        return self._load(bin_name, overrides=overrides, cache=cache)
+
+    def _load(self, bin_name: BinName, overrides: Optional[ProviderLookupDict]=None, cache: bool=False) -> ShallowBinary | None:
         installed_abspath = None
         installed_version = None
 
         if cache:
-            installed_bin = self._install_cache.get(bin_name)
+            installed_bin = self._install_cache.get((self.name, bin_name))
             if installed_bin:
                 return installed_bin
-            installed_abspath = self._abspath_cache.get(bin_name)
-            installed_version = self._version_cache.get(bin_name)
+            installed_abspath = self._abspath_cache.get((self.name, bin_name))
+            installed_version = self._version_cache.get((self.name, bin_name))
 
 
-        installed_abspath = installed_abspath or self.get_abspath(bin_name, overrides=overrides)
+        installed_abspath = installed_abspath or self._get_abspath(bin_name, overrides=overrides)
         if not installed_abspath:
             return None
 
-        installed_version = installed_version or self.get_version(bin_name, abspath=installed_abspath, overrides=overrides)
+        installed_version = installed_version or self._get_version(bin_name, abspath=installed_abspath, overrides=overrides)
         if not installed_version:
             return None
 
@@ -566,9 +716,9 @@ class BinProvider(BaseModel):
 
     @validate_call
     def load_or_install(self, bin_name: BinName, overrides: Optional[ProviderLookupDict]=None, cache: bool=True) -> ShallowBinary | None:
-        installed = self.load(bin_name=bin_name, overrides=overrides, cache=cache)
+        installed = self._load(bin_name, overrides=overrides, cache=cache)
         if not installed:
-            installed = self.install(bin_name=bin_name, overrides=overrides)
+            installed = self._install(bin_name, overrides=overrides)
         return installed
 
 
@@ -587,7 +737,7 @@ class PipProvider(BinProvider):
         for bin_dir in paths:
             if bin_dir not in PATH:
                 PATH = ':'.join([bin_dir, *PATH.split(':')])
-        return TypeAdapter(PATHStr).validate_python(PATH)
+        return _PATH_STR_ADAPTER.validate_python(PATH)
 
     def on_install(self, bin_name: str, subdeps: Optional[InstallStr]=None, **context):
         subdeps = subdeps or self.on_get_subdeps(bin_name)
@@ -628,7 +778,7 @@ class NpmProvider(BinProvider):
         for bin_dir in npm_bin_dirs:
             if bin_dir not in PATH:
                 PATH = ':'.join([bin_dir, *PATH.split(':')])
-        return TypeAdapter(PATHStr).validate_python(PATH)
+        return _PATH_STR_ADAPTER.validate_python(PATH)
 
     def on_install(self, bin_name: str, subdeps: Optional[InstallStr]=None, **context):
         subdeps = subdeps or self.on_get_subdeps(bin_name)
@@ -644,14 +794,20 @@ class NpmProvider(BinProvider):
             raise Exception(f'{self.__class__.__name__}: install got returncode {proc.returncode} while installing {subdeps}: {subdeps}')
 
 
+APT_SUBDEPS_PROVIDER = MappingProxyType({
+    **BinProvider.__fields__['subdeps_provider'].default,
+    'yt-dlp': 'self.get_ytdlp_subdeps',
+})
+
 class AptProvider(BinProvider):
     name: BinProviderName = 'apt'
     BIN: BinName = 'apt-get'
     
-    subdeps_provider: ProviderLookupDict = {
-        **BinProvider.__fields__['subdeps_provider'].default,
-        'yt-dlp': lambda: 'yt-dlp ffmpeg',
-    }
+    subdeps_provider: ProviderLookupDict = Field(default_factory=lambda: dict(APT_SUBDEPS_PROVIDER))
+
+    @staticmethod
+    def get_ytdlp_subdeps():
+        return 'yt-dlp ffmpeg'
 
     @field_validator('PATH', mode='after')
     @classmethod
@@ -661,7 +817,7 @@ class AptProvider(BinProvider):
         for bin_dir in dpkg_bin_dirs:
             if bin_dir not in PATH:
                 PATH = ':'.join([bin_dir, *PATH.split(':')])
-        return TypeAdapter(PATHStr).validate_python(PATH)
+        return _PATH_STR_ADAPTER.validate_python(PATH)
 
 
     def on_install(self, bin_name: BinName, subdeps: Optional[InstallStr]=None, **context):
@@ -706,7 +862,7 @@ class BrewProvider(BinProvider):
         brew_bin_dir = self.exec(bin_name=self.BIN, cmd=['--prefix']).stdout.strip() + '/bin'
         if brew_bin_dir not in PATH:
             PATH = ':'.join([brew_bin_dir, *PATH.split(':')])
-        return TypeAdapter(PATHStr).validate_python(PATH)
+        return _PATH_STR_ADAPTER.validate_python(PATH)
 
     def on_install(self, bin_name: str, subdeps: Optional[InstallStr]=None, **context):
         subdeps = subdeps or self.on_get_subdeps(bin_name)
@@ -724,35 +880,45 @@ class BrewProvider(BinProvider):
 
 
 DEFAULT_ENV_PATH = os.environ.get('PATH', '/bin')
-PYTHON_BIN_DIR = str(Path(sys.executable).parent)
+PYTHON_ABSPATH = Path(sys.executable)
+PYTHON_VERSION_STR = f'{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}'
+PYTHON_BIN_DIR = str(PYTHON_ABSPATH.parent)
 
 if PYTHON_BIN_DIR not in DEFAULT_ENV_PATH:
     DEFAULT_ENV_PATH = PYTHON_BIN_DIR + ':' + DEFAULT_ENV_PATH
 
+ENV_ABSPATH_PROVIDER = MappingProxyType({
+    **BinProvider.__fields__['abspath_provider'].default,
+    'python': 'self.get_python_abspath',
+})
+ENV_VERSION_PROVIDER = MappingProxyType({
+    **BinProvider.__fields__['version_provider'].default,
+    'python': 'self.get_python_version',
+})
+
 
 class EnvProvider(BinProvider):
     name: BinProviderName = 'env'
     BIN: BinName = 'env'
     PATH: PATHStr = Field(default=DEFAULT_ENV_PATH)  # add dir containing python to $PATH
 
-    abspath_provider: ProviderLookupDict = {
-        **BinProvider.__fields__['abspath_provider'].default,
-        'python': 'self.get_python_abspath',
-    }
-    version_provider: ProviderLookupDict = {
-        **BinProvider.__fields__['version_provider'].default,
-        'python': 'self.get_python_version',
-    }
+    # pydantic deep-copies plain dict defaults on every instantiation, a default_factory only needs a shallow copy
+    abspath_provider: ProviderLookupDict = Field(default_factory=lambda: dict(ENV_ABSPATH_PROVIDER))
+    version_provider: ProviderLookupDict = Field(default_factory=lambda: dict(ENV_VERSION_PROVIDER))
 
     @staticmethod
     def get_python_abspath():
-        return Path(sys.executable)
+        return PYTHON_ABSPATH       # can't change for the lifetime of the process, so it's computed once at import
 
     @staticmethod
     def get_python_version():
-        return '{}.{}.{}'.format(*sys.version_info[:3])
+        return PYTHON_VERSION_STR
 
 
     def on_install(self, bin_name: BinName, subdeps: Optional[InstallStr]=None, **context):
         """The env provider is ready-only and does not install any packages, so this is a no-op"""
         pass
+
+    def _is_noop_install(self, install_func: ProviderHandler) -> bool:
+        # only this class's own on_install, subclasses that override it or custom install handlers still get run
+        return getattr(install_func, '__func__', None) is EnvProvider.on_install
@@ -19,6 +19,8 @@ from pydantic import BaseModel, Field, model_validator, computed_field, field_va
 
 
 
+_NON_DIGIT_RE = re.compile(r'[\D]')
+
 
 def is_semver_str(semver: Any) -> bool:
     if isinstance(semver, str):
@@ -94,13 +96,16 @@ class SemVer(SemVerTuple):
             # raise Exception('Tried to parse semver from empty version output (is binary installed and available?)')
             return None
 
-        just_numbers = lambda col: '.'.join([chunk for chunk in re.split(r'[\D]', col.lower().strip('v'), 10) if chunk.isdigit()][:3])  # split on any non-num character e.g. 5.2.26(1)-release -> ['5', '2', '26', '1', '', '', ...]
+        just_numbers = lambda col: '.'.join([chunk for chunk in _NON_DIGIT_RE.split(col.lower().strip('v'), 10) if chunk.isdigit()][:3])  # split on any non-num character e.g. 5.2.26(1)-release -> ['5', '2', '26', '1', '', '', ...]
         contains_semver = lambda col: (
             col.count('.') in (1, 2, 3)
             and all(chunk.isdigit() for chunk in col.split('.')[:3])  # first 3 chunks can only be nums
         )
 
-        full_text = version_stdout.split('\n')[0].strip()
+        full_text = version_stdout.split('\n', 1)[0].strip()    # only the first line is used, don't split up long banners/help output
+        if not any(char.isdigit() for char in full_text):
+            # no digits on the first line at all, no need to run the column parsing below
+            return None
         first_line_columns = full_text.split()[:5]
         version_columns = list(filter(contains_semver, map(just_numbers, first_line_columns)))
         
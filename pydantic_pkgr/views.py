@@ -1,5 +1,7 @@
 # pip install django-admin-data-views
 
+import time
+
 from django.http import HttpRequest
 from django.utils.html import format_html, mark_safe
 
@@ -15,15 +17,27 @@ def get_all_binaries() -> list[Binary]:
     """Override this function implement getting the list of binaries to render"""
     return []
 
-def get_binary(name: str) -> Binary:
+def get_binary(name: str) -> Binary | None:
     """Override this function implement getting the list of binaries to render"""
+    return get_cached_binaries().get(name)
+
+
+BINARIES_CACHE_TTL = 30  # seconds to reuse the result of get_all_pkgr_binaries() before calling it again
+
+_BINARIES_CACHE: dict[str, Binary] = {}
+_BINARIES_CACHE_EXPIRES: float = 0.0
+
+def get_cached_binaries() -> dict[str, Binary]:
+    """get the {name: Binary} mapping from settings.get_all_pkgr_binaries(), rebuilt at most every BINARIES_CACHE_TTL seconds"""
+    global _BINARIES_CACHE, _BINARIES_CACHE_EXPIRES
 
     from . import settings
 
-    for binary in settings.PYDANTIC_PKGR_GET_ALL_BINARIES():
-        if binary.name == key:
-            return binary
-    return None
+    now = time.monotonic()
+    if now >= _BINARIES_CACHE_EXPIRES:
+        _BINARIES_CACHE = {binary.name: binary for binary in settings.get_all_pkgr_binaries()}
+        _BINARIES_CACHE_EXPIRES = now + BINARIES_CACHE_TTL
+    return _BINARIES_CACHE
 
 
 
@@ -32,8 +46,6 @@ def binaries_list_view(request: HttpRequest, **kwargs) -> TableContext:
 
     assert request.user.is_superuser, 'Must be a superuser to view configuration settings.'
 
-    from . import settings
-
     rows = {
         "Binary": [],
         "Found Version": [],
@@ -43,7 +55,7 @@ def binaries_list_view(request: HttpRequest, **kwargs) -> TableContext:
         "Description": [],
     }
 
-    for binary in settings.get_all_pkgr_binaries():
+    for binary in get_cached_binaries().values():
         binary = binary.load_or_install()
 
         rows['Binary'].append(ItemLink(binary.name, key=binary.name))